@@ -1,8 +1,8 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Response
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, Response
 from fastapi.responses import JSONResponse, FileResponse
 from typing import Optional
 import os
-import json
+import orjson
 
 from app.models.repository import (
     RepositoryRequest, 
@@ -16,11 +16,12 @@ from app.services.repository_service import (
     save_uploaded_repository,
     get_repository_status
 )
+from app.services import doc_cache
 from app.core.config import settings
 
 router = APIRouter()
 
-@router.post("/", response_model=RepositoryResponse)
+@router.post("/", response_model=RepositoryResponse, status_code=202)
 async def create_repository(repo_request: RepositoryRequest):
     """
     Create a new repository from GitHub URL.
@@ -32,7 +33,7 @@ async def create_repository(repo_request: RepositoryRequest):
     else:
         raise HTTPException(status_code=400, detail="For file uploads, use the /upload endpoint")
 
-@router.post("/upload", response_model=RepositoryResponse)
+@router.post("/upload", response_model=RepositoryResponse, status_code=202)
 async def upload_repository(file: UploadFile = File(...)):
     """
     Upload a repository as a zip file.
@@ -58,10 +59,26 @@ async def check_repository_status(repo_id: str):
         message=status.get("message")
     )
 
+def _documentation_etag(doc_path: str, pretty: bool = False) -> Optional[str]:
+    """
+    Compute a weak ETag for the documentation file from its mtime and size.
+
+    Returns None if the file doesn't exist.
+    """
+    try:
+        st = os.stat(doc_path)
+    except OSError:
+        return None
+    suffix = "-p" if pretty else ""
+    return f'W/"{st.st_mtime_ns:x}-{st.st_size:x}{suffix}"'
+
 @router.get("/{repo_id}/documentation")
-async def get_documentation(repo_id: str):
+async def get_documentation(repo_id: str, request: Request, pretty: bool = False):
     """
     Get the generated documentation for a repository.
+
+    The stored file is compact JSON; pass ?pretty=1 for an indented form.
+    Responses carry a weak ETag, and a matching If-None-Match returns 304.
     """
     # Check if repository exists and is completed
     status = await get_repository_status(repo_id)
@@ -70,7 +87,7 @@ async def get_documentation(repo_id: str):
 
     if status["status"] != RepositoryStatus.COMPLETED:
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail=f"Documentation not ready. Current status: {status['status']}"
         )
 
@@ -78,19 +95,40 @@ async def get_documentation(repo_id: str):
     repo_path = os.path.join(settings.REPO_STORAGE_DIR, repo_id)
     doc_path = os.path.join(repo_path, "documentation", "documentation.json")
 
+    # Answer polling clients that already hold the current bytes with an
+    # empty 304 before doing any read or cache lookup
+    etag = _documentation_etag(doc_path, pretty)
+    if etag and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    headers = {"ETag": etag} if etag else {}
+
+    # Serve from the Redis cache when possible; a cache hit avoids touching
+    # the filesystem entirely
+    cached = await doc_cache.get_documentation(repo_id)
+    if cached is not None:
+        if pretty:
+            cached = orjson.dumps(orjson.loads(cached), option=orjson.OPT_INDENT_2)
+        return Response(content=cached, media_type="application/json", headers=headers)
+
     if not os.path.exists(doc_path):
         raise HTTPException(status_code=404, detail="Documentation file not found")
 
-    # Read the documentation file
-    try:
-        with open(doc_path, 'r') as f:
-            documentation = json.load(f)
-        return documentation
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading documentation: {str(e)}")
+    if pretty:
+        # Pretty-printing is generated lazily, only for clients that ask
+        with open(doc_path, 'rb') as f:
+            payload = orjson.dumps(orjson.loads(f.read()), option=orjson.OPT_INDENT_2)
+        return Response(content=payload, media_type="application/json", headers=headers)
+
+    # Serve the file directly so the bytes go from the page cache to the
+    # socket without being decoded and re-encoded as Python objects
+    return FileResponse(
+        path=doc_path,
+        media_type="application/json",
+        headers={"Content-Disposition": "inline", **headers}
+    )
 
 @router.get("/{repo_id}/documentation/download")
-async def download_documentation(repo_id: str):
+async def download_documentation(repo_id: str, request: Request):
     """
     Download the generated documentation for a repository.
     """
@@ -112,9 +150,14 @@ async def download_documentation(repo_id: str):
     if not os.path.exists(doc_path):
         raise HTTPException(status_code=404, detail="Documentation file not found")
 
+    etag = _documentation_etag(doc_path)
+    if etag and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
     # Return the file as a download
     return FileResponse(
         path=doc_path,
         filename="documentation.json",
-        media_type="application/json"
+        media_type="application/json",
+        headers={"ETag": etag} if etag else None
     )
@@ -12,13 +12,35 @@ class Settings(BaseSettings):
     # Database
     CHROMA_DB_DIR: str = os.getenv("CHROMA_DB_DIR", "./chroma_db")
 
+    # HNSW index tuning; applied when the collection is first created.
+    # Lower construction_ef cheapens bulk ingestion, M trades index size
+    # for recall, num_threads parallelizes insert-time neighbor search.
+    HNSW_CONSTRUCTION_EF: int = int(os.getenv("HNSW_CONSTRUCTION_EF", "100"))
+    HNSW_M: int = int(os.getenv("HNSW_M", "16"))
+    HNSW_NUM_THREADS: int = int(os.getenv("HNSW_NUM_THREADS", str(os.cpu_count() or 1)))
+
     # Repository
     REPO_STORAGE_DIR: str = os.getenv("REPO_STORAGE_DIR", "./repositories")
 
+    # Shallow blobless clones transfer only the tip tree, which is all
+    # documentation generation needs; disable to keep full history
+    GIT_SHALLOW_CLONE: bool = os.getenv("GIT_SHALLOW_CLONE", "1") == "1"
+
     # Celery
     CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
     CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
 
+    # Queue documentation processing on Celery instead of running it inline.
+    # Off by default: enabling it requires a worker to actually be running
+    # (celery -A app.tasks worker), otherwise tasks queue forever
+    CELERY_DISPATCH: bool = os.getenv("CELERY_DISPATCH", "0") == "1"
+
+    # Embeddings: path to an exported CodeBERT ONNX model, or a HF model name
+    # to load with PyTorch in bfloat16; both empty = mock backend
+    EMBEDDING_ONNX_MODEL: str = os.getenv("EMBEDDING_ONNX_MODEL", "")
+    EMBEDDING_TORCH_MODEL: str = os.getenv("EMBEDDING_TORCH_MODEL", "")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
     class Config:
         case_sensitive = True
 
@@ -1,9 +1,15 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.api import api_router
 from app.core.config import settings
 
+# The single logging configuration for the application; modules only
+# create their own loggers and inherit the root handler set up here
+logging.basicConfig(level=logging.INFO)
+
 app = FastAPI(
     title="Intelligent Code Documentation Generator",
     description="A RAG-based system that automatically generates comprehensive, context-aware documentation for entire codebases.",
@@ -31,5 +37,15 @@ async def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop + httptools replace the default asyncio selector loop and
+    # http.tools parser, cutting per-syscall overhead on upload/download paths
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=max(1, (os.cpu_count() or 2) // 2),
+    )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, HttpUrl, validator
+from pydantic import BaseModel, validator
 from typing import Optional, List
 from enum import Enum
 
@@ -8,13 +8,18 @@ class RepositorySource(str, Enum):
 
 class RepositoryRequest(BaseModel):
     source: RepositorySource
-    url: Optional[HttpUrl] = None
+    # Plain str with a cheap prefix check; pydantic's HttpUrl runs a large
+    # regex plus hostname parsing on every request for no benefit here
+    url: Optional[str] = None
     branch: Optional[str] = None
-    
+
     @validator('url')
     def url_required_for_github(cls, v, values):
-        if values.get('source') == RepositorySource.GITHUB and not v:
-            raise ValueError('URL is required for GitHub repositories')
+        if values.get('source') == RepositorySource.GITHUB:
+            if not v:
+                raise ValueError('URL is required for GitHub repositories')
+            if not v.startswith(('http://', 'https://', 'git@')):
+                raise ValueError('URL must be an http(s) or git URL')
         return v
 
 class RepositoryResponse(BaseModel):
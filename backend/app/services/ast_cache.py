@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import threading
+import logging
+import orjson
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Each thread (and each process-pool worker) gets its own SQLite connection
+_local = threading.local()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ast_cache (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    size INTEGER,
+    structure BLOB
+)
+"""
+
+def _get_connection() -> sqlite3.Connection:
+    """
+    Get (or lazily create) the cache connection for the current thread.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(settings.REPO_STORAGE_DIR, exist_ok=True)
+        db_path = os.path.join(settings.REPO_STORAGE_DIR, ".parser_cache.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(_SCHEMA)
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+def get(file_path: str, stat: os.stat_result):
+    """
+    Look up a cached file structure.
+
+    Args:
+        file_path: Path to the Python file
+        stat: Current stat result for the file
+
+    Returns:
+        The cached structure dictionary, or None if missing or stale
+    """
+    try:
+        row = _get_connection().execute(
+            "SELECT mtime_ns, size, structure FROM ast_cache WHERE path = ?",
+            (file_path,)
+        ).fetchone()
+    except Exception as e:
+        logger.warning("AST cache lookup failed for %s: %s", file_path, str(e))
+        return None
+
+    if row and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+        return orjson.loads(row[2])
+
+    return None
+
+def put(file_path: str, stat: os.stat_result, structure) -> None:
+    """
+    Store a parsed file structure in the cache.
+
+    Args:
+        file_path: Path to the Python file
+        stat: Stat result taken before the file was parsed
+        structure: Parsed structure dictionary to cache
+    """
+    try:
+        conn = _get_connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO ast_cache (path, mtime_ns, size, structure) VALUES (?, ?, ?, ?)",
+            (file_path, stat.st_mtime_ns, stat.st_size, orjson.dumps(structure))
+        )
+        conn.commit()
+    except Exception as e:
+        logger.warning("AST cache store failed for %s: %s", file_path, str(e))
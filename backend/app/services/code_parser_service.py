@@ -1,12 +1,112 @@
 import ast
+import concurrent.futures
 import os
+import threading
 import logging
 from typing import Dict, List, Any, Optional, Tuple
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+from app.services import ast_cache
+
 logger = logging.getLogger(__name__)
 
+# Directories that never contain user source worth documenting
+_SKIP_DIRS = {'.git', '__pycache__', 'node_modules', '.venv', 'venv'}
+
+def _iter_py_files(root: str):
+    """
+    Yield paths of Python files under root using an iterative os.scandir walk.
+
+    scandir reuses the file type returned by readdir, so no extra stat call
+    is made per entry the way os.walk does.
+
+    Args:
+        root: Directory to walk
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in _SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name.endswith('.py') and entry.is_file(follow_symlinks=False):
+                        yield entry.path
+        except OSError as e:
+            logger.warning("Skipping unreadable directory %s: %s", directory, str(e))
+
+def _prefetch_files(paths: List[str]) -> None:
+    """
+    Ask the kernel to read the given files into the page cache.
+
+    Runs ahead of parsing so disk reads overlap with CPU work on a cold
+    repository. A no-op on platforms without posix_fadvise.
+
+    Args:
+        paths: Files to prefetch
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            continue
+
+def parse_python_file(file_path: str) -> Dict[str, Any]:
+    """
+    Parse a Python file and extract its structure.
+
+    Module-level so it can be pickled into worker processes.
+
+    Results are cached on disk keyed by (path, mtime, size), so unchanged
+    files are not reparsed on subsequent runs.
+
+    Args:
+        file_path: Path to the Python file
+
+    Returns:
+        Dictionary containing the file structure
+    """
+    try:
+        stat = os.stat(file_path)
+        cached = ast_cache.get(file_path, stat)
+        if cached is not None:
+            return cached
+
+        # One syscall and one decode: reading in binary mode skips the text
+        # layer's newline translation, and ast.parse accepts the raw bytes
+        # (honouring any encoding declaration) without a prior decode
+        with open(file_path, 'rb') as file:
+            raw = file.read()
+
+        tree = ast.parse(raw, filename=file_path, type_comments=False)
+        content = raw.decode('utf-8', errors='replace')
+        visitor = PythonASTVisitor(content)
+        visitor.visit(tree)
+
+        structure = {
+            'file_path': file_path,
+            'imports': visitor.imports,
+            'classes': visitor.classes,
+            'functions': visitor.functions,
+            'variables': visitor.variables
+        }
+        ast_cache.put(file_path, stat, structure)
+        return structure
+    except Exception as e:
+        logger.error("Error parsing Python file %s: %s", file_path, str(e))
+        return {
+            'file_path': file_path,
+            'error': str(e)
+        }
+
+
 class CodeParserService:
     """
     Service for parsing and analyzing code using AST.
@@ -29,54 +129,33 @@ class CodeParserService:
         Returns:
             Dictionary containing the file structure
         """
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-
-            tree = ast.parse(content)
-            visitor = PythonASTVisitor(content)
-            visitor.visit(tree)
-
-            # Filter out methods from functions list
-            visitor.filter_methods_from_functions()
-
-            return {
-                'file_path': file_path,
-                'imports': visitor.imports,
-                'classes': visitor.classes,
-                'functions': visitor.functions,
-                'variables': visitor.variables
-            }
-        except Exception as e:
-            logger.error(f"Error parsing Python file {file_path}: {str(e)}")
-            return {
-                'file_path': file_path,
-                'error': str(e)
-            }
+        return parse_python_file(file_path)
 
     def analyze_repository(self, repo_path: str) -> Dict[str, Any]:
         """
         Analyze all Python files in a repository.
 
+        Files are parsed in a process pool since ast.parse and the visitor
+        are CPU-bound and independent per file.
+
         Args:
             repo_path: Path to the repository
 
         Returns:
             Dictionary containing the repository structure
         """
-        result = {
-            'repo_path': repo_path,
-            'files': []
-        }
+        py_files = list(_iter_py_files(repo_path))
 
-        for root, _, files in os.walk(repo_path):
-            for file in files:
-                if file.endswith('.py'):
-                    file_path = os.path.join(root, file)
-                    file_structure = self.parse_python_file(file_path)
-                    result['files'].append(file_structure)
+        # Warm the page cache in the background while workers start parsing
+        threading.Thread(target=_prefetch_files, args=(py_files,), daemon=True).start()
 
-        return result
+        with concurrent.futures.ProcessPoolExecutor() as executor:
+            file_structures = list(executor.map(parse_python_file, py_files, chunksize=16))
+
+        return {
+            'repo_path': repo_path,
+            'files': file_structures
+        }
 
     def extract_chunks(self, file_structure: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -88,55 +167,63 @@ class CodeParserService:
         Returns:
             List of semantic chunks
         """
-        chunks = []
-        file_path = file_structure['file_path']
+        return list(_iter_chunks(file_structure))
 
-        # Add classes and their methods as chunks
-        for class_info in file_structure.get('classes', []):
-            # Class chunk
-            class_chunk = {
-                'id': f"{file_path}:class:{class_info['name']}",
-                'type': 'class',
-                'name': class_info['name'],
-                'file_path': file_path,
-                'content': class_info['content'],
-                'docstring': class_info.get('docstring', ''),
-                'line_range': class_info['line_range']
-            }
-            chunks.append(class_chunk)
-
-            # Method chunks
-            for method in class_info.get('methods', []):
-                method_chunk = {
-                    'id': f"{file_path}:method:{class_info['name']}.{method['name']}",
-                    'type': 'method',
-                    'name': method['name'],
-                    'class_name': class_info['name'],
-                    'file_path': file_path,
-                    'content': method['content'],
-                    'docstring': method.get('docstring', ''),
-                    'line_range': method['line_range'],
-                    'params': method.get('params', []),
-                    'returns': method.get('returns', None)
-                }
-                chunks.append(method_chunk)
-
-        # Add standalone functions as chunks
-        for func in file_structure.get('functions', []):
-            func_chunk = {
-                'id': f"{file_path}:function:{func['name']}",
-                'type': 'function',
-                'name': func['name'],
+
+def _iter_chunks(file_structure: Dict[str, Any]):
+    """
+    Yield semantic chunks for a file structure.
+
+    A generator keeps the per-chunk work to a single dict literal with
+    name lookups hoisted out of the literals.
+
+    Args:
+        file_structure: Dictionary containing the file structure
+    """
+    file_path = file_structure['file_path']
+
+    # Classes and their methods
+    for class_info in file_structure.get('classes', []):
+        class_name = class_info['name']
+        yield {
+            'id': f"{file_path}:class:{class_name}",
+            'type': 'class',
+            'name': class_name,
+            'file_path': file_path,
+            'content': class_info['content'],
+            'docstring': class_info.get('docstring', ''),
+            'line_range': class_info['line_range']
+        }
+
+        for method in class_info.get('methods', []):
+            method_name = method['name']
+            yield {
+                'id': f"{file_path}:method:{class_name}.{method_name}",
+                'type': 'method',
+                'name': method_name,
+                'class_name': class_name,
                 'file_path': file_path,
-                'content': func['content'],
-                'docstring': func.get('docstring', ''),
-                'line_range': func['line_range'],
-                'params': func.get('params', []),
-                'returns': func.get('returns', None)
+                'content': method['content'],
+                'docstring': method.get('docstring', ''),
+                'line_range': method['line_range'],
+                'params': method.get('params', []),
+                'returns': method.get('returns', None)
             }
-            chunks.append(func_chunk)
 
-        return chunks
+    # Standalone functions
+    for func in file_structure.get('functions', []):
+        func_name = func['name']
+        yield {
+            'id': f"{file_path}:function:{func_name}",
+            'type': 'function',
+            'name': func_name,
+            'file_path': file_path,
+            'content': func['content'],
+            'docstring': func.get('docstring', ''),
+            'line_range': func['line_range'],
+            'params': func.get('params', []),
+            'returns': func.get('returns', None)
+        }
 
 
 class PythonASTVisitor(ast.NodeVisitor):
@@ -152,28 +239,29 @@ class PythonASTVisitor(ast.NodeVisitor):
             source_code: Source code of the file
         """
         self.source_code = source_code
-        self.source_lines = source_code.splitlines()
+        # Offset of the start of each line, so node source can be extracted
+        # with a single O(1) string slice instead of joining line lists
+        self.line_starts = line_starts = [0]
+        offset = 0
+        for line in source_code.splitlines(keepends=True):
+            offset += len(line)
+            line_starts.append(offset)
         self.imports = []
         self.classes = []
         self.functions = []
         self.variables = []
 
-    def filter_methods_from_functions(self):
+    def visit(self, node: ast.AST) -> None:
         """
-        Filter out methods from the functions list.
-        Methods are already included in their respective classes.
-        """
-        # Create a set of (name, line_range) tuples for all methods
-        method_signatures = set()
-        for class_info in self.classes:
-            for method in class_info.get('methods', []):
-                method_signatures.add((method['name'], method['line_range']))
+        Dispatch a node to its handler via a precomputed type table.
 
-        # Filter out functions that match method signatures
-        self.functions = [
-            func for func in self.functions 
-            if (func['name'], func['line_range']) not in method_signatures
-        ]
+        NodeVisitor.visit builds a "visit_<ClassName>" string and getattrs it
+        for every node; the table turns that into one dict lookup.
+        """
+        handler = _NODE_HANDLERS.get(type(node))
+        if handler is None:
+            return self.generic_visit(node)
+        return handler(self, node)
 
     def visit_Import(self, node: ast.Import) -> None:
         """
@@ -220,14 +308,17 @@ class PythonASTVisitor(ast.NodeVisitor):
         if node.bases:
             class_info['bases'] = [self._get_name(base) for base in node.bases]
 
-        # Visit class body
+        # Visit class body. Methods are handled here; descending into them
+        # again via generic_visit would fire visit_FunctionDef for each one
+        # and require filtering them back out of the functions list.
         for item in node.body:
             if isinstance(item, ast.FunctionDef):
                 method_info = self._process_function(item)
                 class_info['methods'].append(method_info)
+            else:
+                self.visit(item)
 
         self.classes.append(class_info)
-        self.generic_visit(node)
 
     def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
         """
@@ -301,19 +392,9 @@ class PythonASTVisitor(ast.NodeVisitor):
         Get the source code for a node.
         """
         if hasattr(node, 'lineno') and hasattr(node, 'end_lineno'):
-            start_line = node.lineno - 1  # 0-indexed
-            end_line = getattr(node, 'end_lineno', node.lineno) - 1
-
-            if hasattr(node, 'col_offset') and hasattr(node, 'end_col_offset'):
-                if start_line == end_line:
-                    return self.source_lines[start_line][node.col_offset:node.end_col_offset]
-                else:
-                    lines = [self.source_lines[start_line][node.col_offset:]]
-                    lines.extend(self.source_lines[start_line+1:end_line])
-                    lines.append(self.source_lines[end_line][:node.end_col_offset])
-                    return '\n'.join(lines)
-            else:
-                return '\n'.join(self.source_lines[start_line:end_line+1])
+            start = self.line_starts[node.lineno - 1] + node.col_offset
+            end = self.line_starts[node.end_lineno - 1] + node.end_col_offset
+            return self.source_code[start:end]
 
         return ""
 
@@ -346,5 +427,14 @@ class PythonASTVisitor(ast.NodeVisitor):
         else:
             return self._get_node_source(node)
 
+# Dispatch table for PythonASTVisitor.visit, built once at import time
+_NODE_HANDLERS = {
+    ast.Import: PythonASTVisitor.visit_Import,
+    ast.ImportFrom: PythonASTVisitor.visit_ImportFrom,
+    ast.ClassDef: PythonASTVisitor.visit_ClassDef,
+    ast.FunctionDef: PythonASTVisitor.visit_FunctionDef,
+    ast.Assign: PythonASTVisitor.visit_Assign,
+}
+
 # Create a singleton instance
 code_parser = CodeParserService()
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import hashlib
+import logging
+import weakref
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cached documentation expires after a day; oversized payloads stay file-only
+DOC_TTL_SECONDS = 86400
+MAX_CACHED_DOC_BYTES = 10 * 1024 * 1024
+
+# One client per event loop: the async client's connection pool binds to
+# the loop it is first used on, and Celery workers run each task under a
+# fresh asyncio.run() loop, so a single module-global client would break
+# from the second task onward. Weak keys let clients for finished loops
+# be collected.
+_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def _get_client():
+    """
+    Get (or lazily create) the Redis client for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = aioredis.from_url(settings.CELERY_BROKER_URL)
+        _clients[loop] = client
+    return client
+
+def fingerprint_repository(repo_path: str) -> str:
+    """
+    Fingerprint a repository's file tree from paths, mtimes and sizes.
+
+    Args:
+        repo_path: Path to the repository
+
+    Returns:
+        Hex digest identifying the current state of the tree
+    """
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(repo_path):
+        # Generated output and VCS metadata don't affect documentation content
+        dirs[:] = [d for d in dirs if d not in ('.git', 'documentation')]
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            digest.update(f"{file_path}:{st.st_mtime_ns}:{st.st_size}\n".encode())
+    return digest.hexdigest()
+
+async def get_fingerprint(repo_id: str):
+    """
+    Get the cached tree fingerprint for a repository, if any.
+    """
+    try:
+        value = await _get_client().get(f"doc_fp:{repo_id}")
+        return value.decode() if value else None
+    except Exception as e:
+        logger.warning("Documentation cache unavailable: %s", str(e))
+        return None
+
+async def get_documentation(repo_id: str):
+    """
+    Get cached documentation bytes for a repository, if any.
+    """
+    try:
+        return await _get_client().get(f"doc:{repo_id}")
+    except Exception as e:
+        logger.warning("Documentation cache unavailable: %s", str(e))
+        return None
+
+async def set_documentation(repo_id: str, fingerprint: str, payload: bytes) -> None:
+    """
+    Cache documentation bytes and the fingerprint they were generated from.
+
+    Args:
+        repo_id: Repository ID
+        fingerprint: Tree fingerprint the documentation corresponds to
+        payload: Serialized documentation JSON
+    """
+    if len(payload) > MAX_CACHED_DOC_BYTES:
+        logger.info("Documentation for %s too large to cache, serving from file only", repo_id)
+        return
+    try:
+        client = _get_client()
+        await client.set(f"doc:{repo_id}", payload, ex=DOC_TTL_SECONDS)
+        await client.set(f"doc_fp:{repo_id}", fingerprint, ex=DOC_TTL_SECONDS)
+    except Exception as e:
+        logger.warning("Failed to cache documentation for %s: %s", repo_id, str(e))
@@ -1,5 +1,5 @@
 import logging
-import json
+import orjson
 from typing import Dict, List, Any, Optional
 import uuid
 import os
@@ -7,10 +7,10 @@ import os
 from app.services.code_parser_service import code_parser
 from app.services.embedding_service import embedding_service
 from app.services.vector_store_service import vector_store
+from app.services import doc_cache
+from app.services import status_store
 from app.models.repository import RepositoryStatus
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DocumentationService:
@@ -34,22 +34,27 @@ class DocumentationService:
         """
         try:
             # Update repository status
-            from app.services.repository_service import repository_status
-            repository_status[repo_id] = {
-                "status": RepositoryStatus.PROCESSING,
-                "progress": 0.2,
-                "message": "Analyzing code structure..."
-            }
-            
+            status_store.set_status(repo_id, RepositoryStatus.PROCESSING, 0.2, "Analyzing code structure...")
+            
+            # If the file tree is unchanged since the last run, the cached
+            # documentation is still valid and the whole pipeline can be skipped
+            fingerprint = doc_cache.fingerprint_repository(repo_path)
+            if fingerprint == await doc_cache.get_fingerprint(repo_id):
+                cached = await doc_cache.get_documentation(repo_id)
+                if cached is not None:
+                    docs_dir = os.path.join(repo_path, "documentation")
+                    os.makedirs(docs_dir, exist_ok=True)
+                    with open(os.path.join(docs_dir, "documentation.json"), "wb") as f:
+                        f.write(cached)
+                    status_store.set_status(repo_id, RepositoryStatus.COMPLETED, 1.0, "Documentation generated successfully")
+                    logger.info("Served cached documentation for repository %s", repo_id)
+                    return
+
             # Analyze the repository
             repo_structure = code_parser.analyze_repository(repo_path)
             
             # Update progress
-            repository_status[repo_id] = {
-                "status": RepositoryStatus.PROCESSING,
-                "progress": 0.4,
-                "message": "Extracting code chunks..."
-            }
+            status_store.set_status(repo_id, RepositoryStatus.PROCESSING, 0.4, "Extracting code chunks...")
             
             # Extract chunks from all files
             all_chunks = []
@@ -58,21 +63,13 @@ class DocumentationService:
                 all_chunks.extend(chunks)
             
             # Update progress
-            repository_status[repo_id] = {
-                "status": RepositoryStatus.PROCESSING,
-                "progress": 0.6,
-                "message": "Generating embeddings..."
-            }
+            status_store.set_status(repo_id, RepositoryStatus.PROCESSING, 0.6, "Generating embeddings...")
             
             # Process chunks and generate embeddings
-            embedding_service.process_chunks(all_chunks, repo_id)
+            await embedding_service.process_chunks(all_chunks, repo_id)
             
             # Update progress
-            repository_status[repo_id] = {
-                "status": RepositoryStatus.PROCESSING,
-                "progress": 0.8,
-                "message": "Generating documentation..."
-            }
+            status_store.set_status(repo_id, RepositoryStatus.PROCESSING, 0.8, "Generating documentation...")
             
             # Generate documentation
             documentation = self.generate_documentation(repo_id, repo_structure)
@@ -81,27 +78,25 @@ class DocumentationService:
             docs_dir = os.path.join(repo_path, "documentation")
             os.makedirs(docs_dir, exist_ok=True)
             
-            with open(os.path.join(docs_dir, "documentation.json"), "w") as f:
-                json.dump(documentation, f, indent=2)
-            
+            # Compact bytes keep the write and every later read smaller;
+            # clients can ask the API for a pretty-printed form on demand
+            payload = orjson.dumps(documentation)
+            with open(os.path.join(docs_dir, "documentation.json"), "wb") as f:
+                f.write(payload)
+
+            # Cache the serialized documentation so unchanged repos can skip
+            # the pipeline entirely on the next run
+            await doc_cache.set_documentation(repo_id, fingerprint, payload)
+
             # Update status to completed
-            repository_status[repo_id] = {
-                "status": RepositoryStatus.COMPLETED,
-                "progress": 1.0,
-                "message": "Documentation generated successfully"
-            }
+            status_store.set_status(repo_id, RepositoryStatus.COMPLETED, 1.0, "Documentation generated successfully")
             
-            logger.info(f"Documentation generated for repository {repo_id}")
+            logger.info("Documentation generated for repository %s", repo_id)
             
         except Exception as e:
-            logger.error(f"Error processing repository: {str(e)}")
+            logger.error("Error processing repository: %s", str(e))
             # Update status to failed
-            from app.services.repository_service import repository_status
-            repository_status[repo_id] = {
-                "status": RepositoryStatus.FAILED,
-                "progress": 0.0,
-                "message": f"Failed to generate documentation: {str(e)}"
-            }
+            status_store.set_status(repo_id, RepositoryStatus.FAILED, 0.0, f"Failed to generate documentation: {str(e)}")
             raise
     
     def generate_documentation(self, repo_id: str, repo_structure: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import threading
+import logging
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Each thread gets its own SQLite connection
+_local = threading.local()
+
+# SQLite limits the number of bound variables per statement, so batched
+# IN (...) lookups are issued in slices of this size
+_SELECT_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    key TEXT,
+    model TEXT,
+    vec BLOB,
+    PRIMARY KEY (key, model)
+)
+"""
+
+def _get_connection() -> sqlite3.Connection:
+    """
+    Get (or lazily create) the cache connection for the current thread.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(settings.REPO_STORAGE_DIR, exist_ok=True)
+        db_path = os.path.join(settings.REPO_STORAGE_DIR, "embeddings_cache.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(_SCHEMA)
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+def get_many(keys: List[str], model: str) -> Dict[str, np.ndarray]:
+    """
+    Look up cached embeddings for a batch of content keys.
+
+    Args:
+        keys: Content-hash keys to look up
+        model: Identifier of the embedding backend the vectors came from
+
+    Returns:
+        Mapping of found key to its float32 embedding; missing keys are
+        simply absent
+    """
+    found: Dict[str, np.ndarray] = {}
+    try:
+        conn = _get_connection()
+        for start in range(0, len(keys), _SELECT_BATCH_SIZE):
+            batch = keys[start:start + _SELECT_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, vec FROM embedding_cache WHERE model = ? AND key IN ({placeholders})",
+                [model, *batch]
+            ).fetchall()
+            for key, vec in rows:
+                found[key] = np.frombuffer(vec, dtype=np.float32)
+    except Exception as e:
+        logger.warning("Embedding cache lookup failed: %s", str(e))
+        return {}
+    return found
+
+def put_many(keys: List[str], model: str, vectors: np.ndarray) -> None:
+    """
+    Store a batch of embeddings in the cache.
+
+    Args:
+        keys: Content-hash keys, one per vector row
+        model: Identifier of the embedding backend that produced them
+        vectors: Array of shape (len(keys), D) of float32 embeddings
+    """
+    try:
+        conn = _get_connection()
+        conn.executemany(
+            "INSERT OR IGNORE INTO embedding_cache (key, model, vec) VALUES (?, ?, ?)",
+            [(key, model, vectors[i].tobytes()) for i, key in enumerate(keys)]
+        )
+        conn.commit()
+    except Exception as e:
+        logger.warning("Embedding cache store failed: %s", str(e))
@@ -1,19 +1,26 @@
+import asyncio
+import hashlib
 import logging
+import os
 import numpy as np
+import orjson
 from typing import List, Dict, Any, Optional
 import uuid
 
-# In a real implementation, you would use a proper embedding model
-# For this prototype, we'll use a simple mock embedding function
-# In production, you would use something like:
-# from transformers import AutoTokenizer, AutoModel
+# Real embeddings run through ONNX Runtime when an exported model is
+# configured (see settings.EMBEDDING_ONNX_MODEL); otherwise a deterministic
+# mock embedding keeps the rest of the pipeline exercisable
 
 from app.services.vector_store_service import vector_store
+from app.services import embedding_cache
+from app.core.config import settings
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Vectors per collection.add call; balances Chroma's SQLite write
+# amplification against Python-side slicing overhead
+ADD_BATCH_SIZE = 1000
+
 class EmbeddingService:
     """
     Service for generating and managing embeddings for code chunks.
@@ -23,10 +30,70 @@ class EmbeddingService:
         """
         Initialize the embedding service.
         """
-        # In a real implementation, you would load the model here
-        # self.tokenizer = AutoTokenizer.from_pretrained("microsoft/codebert-base")
-        # self.model = AutoModel.from_pretrained("microsoft/codebert-base")
+        self._onnx_session = None
+        self._torch_model = None
+        self._torch_device = None
+        self._tokenizer = None
+        if settings.EMBEDDING_ONNX_MODEL:
+            self._init_onnx_backend(settings.EMBEDDING_ONNX_MODEL)
+        elif settings.EMBEDDING_TORCH_MODEL:
+            self._init_torch_backend(settings.EMBEDDING_TORCH_MODEL)
+        # Identifies which backend produced a vector, so cached embeddings
+        # are never reused across backends
+        if self._onnx_session is not None:
+            self._model_id = f"onnx:{settings.EMBEDDING_ONNX_MODEL}"
+        elif self._torch_model is not None:
+            self._model_id = f"torch:{settings.EMBEDDING_TORCH_MODEL}"
+        else:
+            self._model_id = "mock"
         logger.info("Embedding service initialized")
+
+    def _init_onnx_backend(self, model_path: str) -> None:
+        """
+        Load the exported CodeBERT model into an ONNX Runtime session.
+
+        Falls back to the mock backend if the runtime, tokenizer or model
+        file is unavailable.
+        """
+        try:
+            import onnxruntime
+            from transformers import AutoTokenizer
+
+            self._onnx_session = onnxruntime.InferenceSession(
+                model_path,
+                providers=["CUDAExecutionProvider", "CPUExecutionProvider"]
+            )
+            self._tokenizer = AutoTokenizer.from_pretrained("microsoft/codebert-base")
+            logger.info("ONNX embedding backend loaded from %s", model_path)
+        except Exception as e:
+            logger.warning("ONNX embedding backend unavailable (%s), using mock embeddings", str(e))
+            self._onnx_session = None
+            self._tokenizer = None
+
+    def _init_torch_backend(self, model_name: str) -> None:
+        """
+        Load the embedding model with PyTorch in bfloat16.
+
+        bfloat16 weights halve memory traffic versus fp32-with-autocast and
+        skip the per-layer cast wrappers autocast inserts. Falls back to the
+        mock backend if torch or the model is unavailable.
+        """
+        try:
+            import torch
+            from transformers import AutoTokenizer, AutoModel
+
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            self._torch_model = AutoModel.from_pretrained(
+                model_name, torch_dtype=torch.bfloat16
+            ).to(device).eval()
+            self._torch_device = device
+            self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+            logger.info("Torch embedding backend loaded (%s, bfloat16, %s)", model_name, device)
+        except Exception as e:
+            logger.warning("Torch embedding backend unavailable (%s), using mock embeddings", str(e))
+            self._torch_model = None
+            self._torch_device = None
+            self._tokenizer = None
     
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -38,24 +105,129 @@ class EmbeddingService:
         Returns:
             A list of floats representing the embedding
         """
-        # In a real implementation, you would use the model to generate embeddings
-        # Here we'll just create a simple mock embedding
-        # The dimensionality is set to 768 to match CodeBERT's output
-        
-        # Create a deterministic but unique embedding based on the text
-        # This is just for demonstration purposes
-        text_hash = hash(text) % 10000
-        np.random.seed(text_hash)
-        
-        # Generate a random embedding vector (768 dimensions)
-        embedding = np.random.normal(0, 1, 768).tolist()
-        
-        return embedding
-    
-    def process_chunks(self, chunks: List[Dict[str, Any]], repo_id: str) -> None:
+        return self.generate_embeddings([text])[0].tolist()
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for a batch of texts in one call.
+
+        A real encoder processes a whole batch per forward pass, so callers
+        should always hand over every text at once rather than looping.
+
+        Args:
+            texts: The texts to embed
+
+        Returns:
+            Array of shape (len(texts), 768), one row per input text
+        """
+        if not texts:
+            return np.empty((0, 768), dtype=np.float32)
+
+        if self._onnx_session is not None:
+            return self._generate_embeddings_onnx(texts)
+
+        if self._torch_model is not None:
+            return self._generate_embeddings_torch(texts)
+
+        # Mock backend: the dimensionality is 768 to match CodeBERT's output
+
+        # Each row is drawn from its own stream seeded by that text's digest
+        # alone, so a text embeds identically regardless of batch size,
+        # ordering or which process computed it. blake2b is used instead of
+        # hash() because Python's hash is salted per process, so the same
+        # text would embed differently in the API and a Celery worker.
+        out = np.empty((len(texts), 768), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(
+                hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little'
+            )
+            rng = np.random.default_rng(np.random.Philox(key=seed))
+            out[i] = rng.standard_normal(768, dtype=np.float32)
+        return out
+
+    def _generate_embeddings_onnx(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts with the ONNX session in length-sorted batches.
+
+        Sorting by length keeps padding within each batch minimal, so the
+        GEMMs stay dense; results are written back in the original order.
+
+        Args:
+            texts: The texts to embed
+
+        Returns:
+            Array of shape (len(texts), 768) of mean-pooled hidden states
+        """
+        batch_size = settings.EMBEDDING_BATCH_SIZE
+        input_names = {i.name for i in self._onnx_session.get_inputs()}
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out = np.empty((len(texts), 768), dtype=np.float32)
+
+        for start in range(0, len(order), batch_size):
+            batch_idx = order[start:start + batch_size]
+            encoded = self._tokenizer(
+                [texts[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                return_tensors='np'
+            )
+            feeds = {name: encoded[name] for name in input_names if name in encoded}
+            hidden = self._onnx_session.run(None, feeds)[0]
+
+            # Masked mean pooling over the token axis
+            mask = encoded['attention_mask'][:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            out[batch_idx] = pooled.astype(np.float32)
+
+        return out
+
+    def _generate_embeddings_torch(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts with the bfloat16 torch model in length-sorted batches.
+
+        Runs under inference_mode with no autocast - the weights are already
+        bfloat16 - and upcasts only the final hidden state to float32 before
+        masked mean pooling and L2 normalization.
+
+        Args:
+            texts: The texts to embed
+
+        Returns:
+            Array of shape (len(texts), 768) of normalized pooled embeddings
+        """
+        import torch
+        import torch.nn.functional as F
+
+        batch_size = settings.EMBEDDING_BATCH_SIZE
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out = np.empty((len(texts), 768), dtype=np.float32)
+
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                batch_idx = order[start:start + batch_size]
+                encoded = self._tokenizer(
+                    [texts[i] for i in batch_idx],
+                    padding=True,
+                    truncation=True,
+                    return_tensors='pt'
+                ).to(self._torch_device)
+
+                hidden = self._torch_model(**encoded).last_hidden_state.float()
+                mask = encoded['attention_mask'].unsqueeze(-1).float()
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                pooled = F.normalize(pooled, dim=1)
+                out[batch_idx] = pooled.cpu().numpy()
+
+        return out
+
+    async def process_chunks(self, chunks: List[Dict[str, Any]], repo_id: str) -> None:
         """
         Process a list of code chunks, generate embeddings, and store them.
-        
+
+        Inserts are issued in fixed-size batches on worker threads so one
+        huge repository neither exceeds Chroma's internal batch limits nor
+        blocks the event loop.
+
         Args:
             chunks: List of code chunks
             repo_id: Repository ID
@@ -65,88 +237,231 @@ class EmbeddingService:
             return
         
         try:
+            # Prepare all texts up front and embed them in a single batched
+            # call; identical texts (repeated boilerplate) are embedded once
+            texts = [self._prepare_text_for_embedding(chunk) for chunk in chunks]
+            unique_index: Dict[str, int] = {}
+            unique_texts = []
+            for text in texts:
+                if text not in unique_index:
+                    unique_index[text] = len(unique_texts)
+                    unique_texts.append(text)
+            # Serve previously embedded texts from the on-disk cache and run
+            # the encoder only on the misses, so re-documenting a repository
+            # whose code hasn't changed skips embedding work entirely
+            keys = [
+                hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+                for text in unique_texts
+            ]
+            cached = embedding_cache.get_many(keys, self._model_id)
+            unique_embeddings = np.empty((len(unique_texts), 768), dtype=np.float32)
+            miss_rows = []
+            for i, key in enumerate(keys):
+                if key in cached:
+                    unique_embeddings[i] = cached[key]
+                else:
+                    miss_rows.append(i)
+            if miss_rows:
+                fresh = self.generate_embeddings([unique_texts[i] for i in miss_rows])
+                unique_embeddings[miss_rows] = fresh
+                embedding_cache.put_many([keys[i] for i in miss_rows], self._model_id, fresh)
+
+            # Gather per-chunk rows with one fancy-index instead of appending
+            # 768-float Python lists per chunk
+            embeddings = unique_embeddings[[unique_index[text] for text in texts]]
+
+            # L2-normalize so the collection's inner-product distance ranks
+            # exactly like cosine without paying cosine's per-distance
+            # normalization during search
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+
             ids = []
-            embeddings = []
             metadatas = []
             documents = []
-            
+
             for chunk in chunks:
-                # Generate a unique ID for the chunk
-                chunk_id = str(uuid.uuid4())
-                
-                # Prepare the text for embedding
-                text_to_embed = self._prepare_text_for_embedding(chunk)
-                
-                # Generate the embedding
-                embedding = self.generate_embedding(text_to_embed)
-                
-                # Prepare metadata
-                metadata = {
-                    'repository_id': repo_id,
-                    'file_path': chunk['file_path'],
-                    'type': chunk['type'],
-                    'name': chunk['name'],
-                    'line_range': f"{chunk['line_range'][0]}-{chunk['line_range'][1]}"
-                }
-                
-                if chunk['type'] in ['method', 'function']:
-                    metadata['params'] = str(chunk.get('params', []))
-                    metadata['returns'] = str(chunk.get('returns', None))
-                
-                if chunk['type'] == 'method':
-                    metadata['class_name'] = chunk['class_name']
-                
-                # Add to lists
-                ids.append(chunk_id)
-                embeddings.append(embedding)
-                metadatas.append(metadata)
+                # Prefix the ID with the repository so deletion can target
+                # known IDs instead of scanning every vector's metadata
+                ids.append(f"{repo_id}:{uuid.uuid4().hex}")
+
+                # One type dispatch per chunk replaces the chain of type
+                # checks the loop used to re-evaluate for every field
+                metadatas.append(_META_BUILDERS[chunk['type']](chunk, repo_id))
                 documents.append(chunk['content'])
             
-            # Store in vector database
-            vector_store.add_embeddings(ids, embeddings, metadatas, documents)
-            logger.info(f"Processed and stored {len(chunks)} chunks for repository {repo_id}")
+            # Store in vector database; the array slices are handed over
+            # as-is and unboxed once inside add_embeddings
+            await asyncio.gather(*[
+                asyncio.to_thread(
+                    vector_store.add_embeddings,
+                    ids[start:start + ADD_BATCH_SIZE],
+                    embeddings[start:start + ADD_BATCH_SIZE],
+                    metadatas[start:start + ADD_BATCH_SIZE],
+                    documents[start:start + ADD_BATCH_SIZE]
+                )
+                for start in range(0, len(ids), ADD_BATCH_SIZE)
+            ])
+
+            # Persist the inserted IDs so delete_by_repository can remove
+            # them by ID rather than with a metadata where-scan. Appended,
+            # not overwritten: a reprocessing run inserts fresh UUIDs, and
+            # truncating here would orphan the previous run's vectors.
+            # Lives under documentation/ because that directory is excluded
+            # from the tree fingerprint - at the repository root the sidecar
+            # would invalidate the fingerprint it was just computed from
+            ids_dir = os.path.join(settings.REPO_STORAGE_DIR, repo_id, "documentation")
+            os.makedirs(ids_dir, exist_ok=True)
+            with open(os.path.join(ids_dir, "ids.txt"), "a") as f:
+                f.write("\n".join(ids) + "\n")
+
+            logger.info("Processed and stored %d chunks for repository %s", len(chunks), repo_id)
             
         except Exception as e:
-            logger.error(f"Error processing chunks: {str(e)}")
+            logger.error("Error processing chunks: %s", str(e))
             raise
     
     def _prepare_text_for_embedding(self, chunk: Dict[str, Any]) -> str:
         """
         Prepare a chunk's text for embedding.
-        
+
+        Dispatches to a per-type builder so each chunk is formatted with a
+        single f-string instead of assembling and joining a parts list.
+
         Args:
             chunk: The code chunk
-            
+
         Returns:
             Prepared text
         """
-        # Combine relevant information for better embeddings
-        parts = []
-        
-        # Add type and name
-        parts.append(f"{chunk['type']}: {chunk['name']}")
-        
-        # Add class name for methods
-        if chunk['type'] == 'method':
-            parts.append(f"class: {chunk['class_name']}")
-        
-        # Add docstring if available
-        if chunk.get('docstring'):
-            parts.append(f"docstring: {chunk['docstring']}")
-        
-        # Add parameters for methods and functions
-        if chunk['type'] in ['method', 'function'] and chunk.get('params'):
-            params_str = ", ".join([f"{p['name']}: {p.get('type', 'any')}" for p in chunk['params']])
-            parts.append(f"parameters: {params_str}")
-        
-        # Add return type if available
-        if chunk['type'] in ['method', 'function'] and chunk.get('returns'):
-            parts.append(f"returns: {chunk['returns']}")
-        
-        # Add the actual code content
-        parts.append(f"code: {chunk['content']}")
-        
-        return "\n".join(parts)
+        return _TEXT_BUILDERS[chunk['type']](chunk)
+
+
+def _callable_sections(chunk: Dict[str, Any]) -> str:
+    """
+    Format the docstring/parameter/return sections shared by functions
+    and methods; each section carries its own leading newline so empty
+    ones vanish from the output without a join over a parts list.
+    """
+    docstring = chunk.get('docstring')
+    params = chunk.get('params')
+    returns = chunk.get('returns')
+    sections = f"\ndocstring: {docstring}" if docstring else ""
+    if params:
+        params_str = ", ".join(
+            f"{p['name']}: {p.get('type', 'any')}" for p in params
+        )
+        sections += f"\nparameters: {params_str}"
+    if returns:
+        sections += f"\nreturns: {returns}"
+    return sections
+
+
+def _prep_function(chunk: Dict[str, Any]) -> str:
+    """
+    Build the embedding text for a standalone function chunk.
+    """
+    return (
+        f"function: {chunk['name']}"
+        f"{_callable_sections(chunk)}"
+        f"\ncode: {chunk['content']}"
+    )
+
+
+def _prep_method(chunk: Dict[str, Any]) -> str:
+    """
+    Build the embedding text for a method chunk.
+    """
+    return (
+        f"method: {chunk['name']}"
+        f"\nclass: {chunk['class_name']}"
+        f"{_callable_sections(chunk)}"
+        f"\ncode: {chunk['content']}"
+    )
+
+
+def _prep_class(chunk: Dict[str, Any]) -> str:
+    """
+    Build the embedding text for a class chunk.
+    """
+    docstring = chunk.get('docstring')
+    docstring_section = f"\ndocstring: {docstring}" if docstring else ""
+    return (
+        f"class: {chunk['name']}"
+        f"{docstring_section}"
+        f"\ncode: {chunk['content']}"
+    )
+
+
+# Per-chunk-type text builders, resolved with one dict lookup per chunk
+_TEXT_BUILDERS = {
+    'function': _prep_function,
+    'method': _prep_method,
+    'class': _prep_class,
+}
+
+
+def _meta_class(chunk: Dict[str, Any], repo_id: str) -> Dict[str, Any]:
+    """
+    Build the stored metadata for a class chunk.
+    """
+    line_range = chunk['line_range']
+    return {
+        'repository_id': repo_id,
+        'file_path': chunk['file_path'],
+        'type': 'class',
+        'name': chunk['name'],
+        'line_range': f"{line_range[0]}-{line_range[1]}"
+    }
+
+
+def _meta_function(chunk: Dict[str, Any], repo_id: str) -> Dict[str, Any]:
+    """
+    Build the stored metadata for a standalone function chunk.
+
+    Params are serialized once with orjson into valid JSON, and the count
+    is kept as a plain int so metadata filters like
+    {"num_params": {"$gt": 3}} need no string parsing.
+    """
+    line_range = chunk['line_range']
+    params = chunk.get('params') or []
+    return {
+        'repository_id': repo_id,
+        'file_path': chunk['file_path'],
+        'type': 'function',
+        'name': chunk['name'],
+        'line_range': f"{line_range[0]}-{line_range[1]}",
+        'params': orjson.dumps(params).decode(),
+        'num_params': len(params),
+        'returns': chunk.get('returns') or ""
+    }
+
+
+def _meta_method(chunk: Dict[str, Any], repo_id: str) -> Dict[str, Any]:
+    """
+    Build the stored metadata for a method chunk.
+    """
+    line_range = chunk['line_range']
+    params = chunk.get('params') or []
+    return {
+        'repository_id': repo_id,
+        'file_path': chunk['file_path'],
+        'type': 'method',
+        'name': chunk['name'],
+        'class_name': chunk['class_name'],
+        'line_range': f"{line_range[0]}-{line_range[1]}",
+        'params': orjson.dumps(params).decode(),
+        'num_params': len(params),
+        'returns': chunk.get('returns') or ""
+    }
+
+
+# Per-chunk-type metadata builders; each returns the full dict in one
+# literal instead of growing a base dict through type checks
+_META_BUILDERS = {
+    'class': _meta_class,
+    'function': _meta_function,
+    'method': _meta_method,
+}
 
 # Create a singleton instance
 embedding_service = EmbeddingService()
\ No newline at end of file
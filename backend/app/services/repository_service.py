@@ -1,21 +1,31 @@
+import concurrent.futures
 import os
+import threading
 import uuid
 import shutil
-import git
+import zipfile
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional, Dict, Any
 import asyncio
 import logging
 
 from app.core.config import settings
+from app.services import status_store
 from app.models.repository import RepositorySource, RepositoryStatus, RepositoryResponse
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# In-memory storage for repository status (in a real app, use a database)
-repository_status: Dict[str, Dict[str, Any]] = {}
+# Bound on clones running at once, so a burst of requests doesn't fork an
+# unbounded number of git processes all competing for network bandwidth
+_clone_sema = asyncio.Semaphore(8)
+
+# Dedicated pool for zip extraction; keeps the blocking zlib work off the
+# default executor, whose threads are shared with other run_in_threadpool
+# callers like the status filesystem fallback
+_extract_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="unzip"
+)
 
 async def clone_github_repository(url: str, branch: Optional[str] = None) -> RepositoryResponse:
     """
@@ -28,11 +38,7 @@ async def clone_github_repository(url: str, branch: Optional[str] = None) -> Rep
     os.makedirs(settings.REPO_STORAGE_DIR, exist_ok=True)
 
     # Update status to pending
-    repository_status[repo_id] = {
-        "status": RepositoryStatus.PENDING,
-        "progress": 0.0,
-        "message": "Repository cloning initiated"
-    }
+    status_store.set_status(repo_id, RepositoryStatus.PENDING, 0.0, "Repository cloning initiated")
 
     try:
         # Start cloning in a background task
@@ -40,7 +46,7 @@ async def clone_github_repository(url: str, branch: Optional[str] = None) -> Rep
             _clone_repository_task(repo_id, url, repo_path, branch)
         )
 
-        return RepositoryResponse(
+        return RepositoryResponse.construct(
             id=repo_id,
             source=RepositorySource.GITHUB,
             url=url,
@@ -49,13 +55,9 @@ async def clone_github_repository(url: str, branch: Optional[str] = None) -> Rep
             message="Repository cloning initiated"
         )
     except Exception as e:
-        logger.error(f"Error initiating repository clone: {str(e)}")
-        repository_status[repo_id] = {
-            "status": RepositoryStatus.FAILED,
-            "progress": 0.0,
-            "message": f"Failed to initiate repository clone: {str(e)}"
-        }
-        return RepositoryResponse(
+        logger.error("Error initiating repository clone: %s", str(e))
+        status_store.set_status(repo_id, RepositoryStatus.FAILED, 0.0, f"Failed to initiate repository clone: {str(e)}")
+        return RepositoryResponse.construct(
             id=repo_id,
             source=RepositorySource.GITHUB,
             url=url,
@@ -76,11 +78,7 @@ async def save_uploaded_repository(file: UploadFile) -> RepositoryResponse:
     os.makedirs(settings.REPO_STORAGE_DIR, exist_ok=True)
 
     # Update status to pending
-    repository_status[repo_id] = {
-        "status": RepositoryStatus.PENDING,
-        "progress": 0.0,
-        "message": "Repository upload initiated"
-    }
+    status_store.set_status(repo_id, RepositoryStatus.PENDING, 0.0, "Repository upload initiated")
 
     try:
         # Start processing in a background task
@@ -88,20 +86,16 @@ async def save_uploaded_repository(file: UploadFile) -> RepositoryResponse:
             _process_uploaded_file_task(repo_id, file, zip_path, repo_path)
         )
 
-        return RepositoryResponse(
+        return RepositoryResponse.construct(
             id=repo_id,
             source=RepositorySource.FILE_UPLOAD,
             status=RepositoryStatus.PENDING,
             message="Repository upload initiated"
         )
     except Exception as e:
-        logger.error(f"Error processing uploaded file: {str(e)}")
-        repository_status[repo_id] = {
-            "status": RepositoryStatus.FAILED,
-            "progress": 0.0,
-            "message": f"Failed to process uploaded file: {str(e)}"
-        }
-        return RepositoryResponse(
+        logger.error("Error processing uploaded file: %s", str(e))
+        status_store.set_status(repo_id, RepositoryStatus.FAILED, 0.0, f"Failed to process uploaded file: {str(e)}")
+        return RepositoryResponse.construct(
             id=repo_id,
             source=RepositorySource.FILE_UPLOAD,
             status=RepositoryStatus.FAILED,
@@ -112,18 +106,67 @@ async def get_repository_status(repo_id: str) -> Optional[Dict[str, Any]]:
     """
     Get the current status of a repository.
     """
-    # First check if the status is in memory
-    status = repository_status.get(repo_id)
+    # First check the shared status store; it is visible across workers
+    # unlike the in-process dict it replaced
+    status = status_store.get_status(repo_id)
     if status:
         return status
 
-    # If not in memory (e.g., after server restart), check if the repository directory exists
+    # If not recorded (e.g., after the store expired entries), fall back to the filesystem.
+    # The checks are plain sync stat calls run in the threadpool so they don't
+    # block the event loop for other requests.
+    return await run_in_threadpool(_status_from_filesystem, repo_id)
+
+# Repositories whose documentation already exists on disk, indexed once
+# with a single scandir pass on first use and extended as later lookups
+# discover new completions. Polling clients hit this set instead of
+# paying stat calls on every status request.
+_completed_repos: Optional[set] = None
+_completed_repos_lock = threading.Lock()
+
+def _get_completed_repos() -> set:
+    """
+    Get (or lazily build) the set of repo IDs completed on disk.
+    """
+    global _completed_repos
+    if _completed_repos is None:
+        with _completed_repos_lock:
+            if _completed_repos is None:
+                completed = set()
+                try:
+                    with os.scandir(settings.REPO_STORAGE_DIR) as it:
+                        for entry in it:
+                            if entry.is_dir(follow_symlinks=False) and os.path.exists(
+                                os.path.join(entry.path, "documentation", "documentation.json")
+                            ):
+                                completed.add(entry.name)
+                except OSError as e:
+                    logger.warning("Could not index repository storage: %s", str(e))
+                _completed_repos = completed
+    return _completed_repos
+
+def _status_from_filesystem(repo_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Derive the status of a repository from what exists on disk.
+
+    Consults the completed-repository index first, so repeated polls for
+    finished repositories cost a set lookup rather than three stat calls.
+    """
+    if repo_id in _get_completed_repos():
+        return {
+            "status": RepositoryStatus.COMPLETED,
+            "progress": 1.0,
+            "message": "Documentation generated successfully"
+        }
+
     repo_path = os.path.join(settings.REPO_STORAGE_DIR, repo_id)
     if os.path.exists(repo_path):
         # Check if documentation has been generated
         doc_path = os.path.join(repo_path, "documentation", "documentation.json")
         if os.path.exists(doc_path):
-            # Documentation has been generated, return completed status
+            # Documentation has been generated; remember it so the next
+            # poll is answered from the index
+            _get_completed_repos().add(repo_id)
             return {
                 "status": RepositoryStatus.COMPLETED,
                 "progress": 1.0,
@@ -140,6 +183,23 @@ async def get_repository_status(repo_id: str) -> Optional[Dict[str, Any]]:
     # Repository not found
     return None
 
+async def _dispatch_processing(repo_id: str, repo_path: str) -> None:
+    """
+    Run documentation processing inline, or queue it on Celery when
+    CELERY_DISPATCH is enabled and a worker is deployed. Queueing still
+    falls back to inline processing if the broker is unreachable.
+    """
+    if settings.CELERY_DISPATCH:
+        from app.tasks import process_repository_task
+        try:
+            process_repository_task.delay(repo_id, repo_path)
+            return
+        except Exception as e:
+            logger.warning("Celery broker unavailable (%s), processing inline", str(e))
+
+    from app.services.documentation_service import documentation_service
+    await documentation_service.process_repository(repo_id, repo_path)
+
 # Background tasks
 async def _clone_repository_task(repo_id: str, url: str, repo_path: str, branch: Optional[str] = None):
     """
@@ -147,90 +207,100 @@ async def _clone_repository_task(repo_id: str, url: str, repo_path: str, branch:
     """
     try:
         # Update status to processing
-        repository_status[repo_id] = {
-            "status": RepositoryStatus.PROCESSING,
-            "progress": 0.1,
-            "message": "Cloning repository..."
-        }
+        status_store.set_status(repo_id, RepositoryStatus.PROCESSING, 0.1, "Cloning repository...")
 
-        # Clone the repository
+        # Clone the repository with a subprocess rather than GitPython:
+        # no per-commit Python object overhead, and the event loop isn't
+        # blocked while git transfers data
+        args = ["git", "clone", "--single-branch"]
+        if settings.GIT_SHALLOW_CLONE:
+            args += ["--depth=1", "--filter=blob:none"]
         if branch:
-            git.Repo.clone_from(url, repo_path, branch=branch)
-        else:
-            git.Repo.clone_from(url, repo_path)
+            args += ["-b", branch]
+        args += [url, repo_path]
+
+        # The semaphore bounds how many git processes run at once; queued
+        # clones simply wait here without holding any other resource
+        async with _clone_sema:
+            proc = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"git clone failed: {stderr.decode().strip()}")
 
         # Update status
-        repository_status[repo_id] = {
-            "status": RepositoryStatus.PROCESSING,
-            "progress": 0.2,
-            "message": "Repository cloned, starting documentation generation..."
-        }
+        status_store.set_status(repo_id, RepositoryStatus.PROCESSING, 0.2, "Repository cloned, starting documentation generation...")
 
-        # Process the repository with documentation service
-        from app.services.documentation_service import documentation_service
-        await documentation_service.process_repository(repo_id, repo_path)
+        # Hand the heavy pipeline to a Celery worker so the API event loop
+        # stays free; fall back to inline processing if no broker is running
+        await _dispatch_processing(repo_id, repo_path)
 
     except Exception as e:
-        logger.error(f"Error cloning repository: {str(e)}")
-        repository_status[repo_id] = {
-            "status": RepositoryStatus.FAILED,
-            "progress": 0.0,
-            "message": f"Failed to clone repository: {str(e)}"
-        }
+        logger.error("Error cloning repository: %s", str(e))
+        status_store.set_status(repo_id, RepositoryStatus.FAILED, 0.0, f"Failed to clone repository: {str(e)}")
         # Clean up
         if os.path.exists(repo_path):
             shutil.rmtree(repo_path)
 
+def _extract_zip(zip_path: str, repo_path: str) -> None:
+    """
+    Extract an uploaded zip archive into the repository directory and
+    remove the archive afterwards.
+
+    Member paths are validated first so a crafted archive can't write
+    outside the repository directory via ../ components or absolute
+    paths (zip-slip).
+    """
+    os.makedirs(repo_path, exist_ok=True)
+    root = os.path.realpath(repo_path)
+    with zipfile.ZipFile(zip_path, 'r') as archive:
+        for name in archive.namelist():
+            target = os.path.realpath(os.path.join(root, name))
+            if target != root and not target.startswith(root + os.sep):
+                raise ValueError(f"Unsafe path in uploaded archive: {name}")
+        archive.extractall(repo_path)
+    os.remove(zip_path)
+
 async def _process_uploaded_file_task(repo_id: str, file: UploadFile, zip_path: str, repo_path: str):
     """
     Background task to process an uploaded repository file.
     """
     try:
         # Update status to processing
-        repository_status[repo_id] = {
-            "status": RepositoryStatus.PROCESSING,
-            "progress": 0.1,
-            "message": "Processing uploaded file..."
-        }
+        status_store.set_status(repo_id, RepositoryStatus.PROCESSING, 0.1, "Processing uploaded file...")
 
-        # Save the uploaded file
+        # Stream the upload to disk in 1 MiB chunks so memory stays bounded
+        # instead of buffering the whole archive in RAM first
         with open(zip_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
-        # Extract the zip file
-        # Note: In a real implementation, you would use a library like zipfile to extract the contents
-        # For now, we'll just simulate the process
-        os.makedirs(repo_path, exist_ok=True)
+            while chunk := await file.read(1 << 20):
+                buffer.write(chunk)
+            if hasattr(os, "posix_fadvise"):
+                # The archive is only read back once for extraction, so tell
+                # the kernel not to keep it in the page cache
+                os.posix_fadvise(buffer.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
 
         # Update progress
-        repository_status[repo_id] = {
-            "status": RepositoryStatus.PROCESSING,
-            "progress": 0.5,
-            "message": "Extracting repository..."
-        }
+        status_store.set_status(repo_id, RepositoryStatus.PROCESSING, 0.5, "Extracting repository...")
 
-        # Simulate extraction delay
-        await asyncio.sleep(1)
+        # Extraction is blocking zlib + filesystem work, so run it on the
+        # dedicated pool to keep the event loop free for other requests
+        await asyncio.get_running_loop().run_in_executor(
+            _extract_pool, _extract_zip, zip_path, repo_path
+        )
 
         # Update status
-        repository_status[repo_id] = {
-            "status": RepositoryStatus.PROCESSING,
-            "progress": 0.6,
-            "message": "Repository extracted, starting documentation generation..."
-        }
+        status_store.set_status(repo_id, RepositoryStatus.PROCESSING, 0.6, "Repository extracted, starting documentation generation...")
 
-        # Process the repository with documentation service
-        from app.services.documentation_service import documentation_service
-        await documentation_service.process_repository(repo_id, repo_path)
+        # Hand the heavy pipeline to a Celery worker so the API event loop
+        # stays free; fall back to inline processing if no broker is running
+        await _dispatch_processing(repo_id, repo_path)
 
     except Exception as e:
-        logger.error(f"Error processing uploaded file: {str(e)}")
-        repository_status[repo_id] = {
-            "status": RepositoryStatus.FAILED,
-            "progress": 0.0,
-            "message": f"Failed to process uploaded file: {str(e)}"
-        }
+        logger.error("Error processing uploaded file: %s", str(e))
+        status_store.set_status(repo_id, RepositoryStatus.FAILED, 0.0, f"Failed to process uploaded file: {str(e)}")
         # Clean up
         if os.path.exists(zip_path):
             os.remove(zip_path)
@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Entries expire after a week so abandoned repositories don't accumulate
+STATUS_TTL_SECONDS = 7 * 86400
+
+# Cap on the in-process fallback so it can't grow without bound when
+# Redis stays down for a long stretch
+_FALLBACK_MAX_ENTRIES = 10_000
+
+_client = None
+
+# Worker-local fallback used only when Redis is unreachable (e.g. local
+# development without a broker); it does not survive restarts or scale
+# across workers the way the Redis path does. Entries carry an expiry
+# timestamp and the dict is guarded by a lock, since statuses are written
+# from background tasks and read from request handlers concurrently.
+_fallback: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_fallback_lock = threading.Lock()
+
+def _fallback_set(repo_id: str, data: Dict[str, Any]) -> None:
+    """
+    Store a status in the in-process fallback, expiring stale entries and
+    evicting the oldest ones if the cap is still exceeded.
+    """
+    now = time.monotonic()
+    with _fallback_lock:
+        expired = [key for key, (expires, _) in _fallback.items() if expires <= now]
+        for key in expired:
+            del _fallback[key]
+        while len(_fallback) >= _FALLBACK_MAX_ENTRIES:
+            # Dicts iterate in insertion order, so the first key is the oldest
+            del _fallback[next(iter(_fallback))]
+        _fallback[repo_id] = (now + STATUS_TTL_SECONDS, data)
+
+def _fallback_get(repo_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a status from the in-process fallback, honouring its expiry.
+    """
+    with _fallback_lock:
+        entry = _fallback.get(repo_id)
+        if entry is None:
+            return None
+        expires, data = entry
+        if expires <= time.monotonic():
+            del _fallback[repo_id]
+            return None
+        return data
+
+def _get_client() -> redis.Redis:
+    """
+    Get (or lazily create) the shared Redis client.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.CELERY_BROKER_URL, decode_responses=True)
+    return _client
+
+def set_status(repo_id: str, status: str, progress: float, message: str = "") -> None:
+    """
+    Record the processing status of a repository.
+
+    Args:
+        repo_id: Repository ID
+        status: One of the RepositoryStatus values
+        progress: Progress between 0.0 and 1.0
+        message: Human-readable progress message
+    """
+    try:
+        client = _get_client()
+        key = f"repo:{repo_id}"
+        client.hset(key, mapping={
+            # RepositoryStatus is a str-mixin enum; str() would render the
+            # member name ("RepositoryStatus.PROCESSING"), so take the value
+            "status": getattr(status, "value", status),
+            "progress": progress,
+            "message": message or ""
+        })
+        client.expire(key, STATUS_TTL_SECONDS)
+    except Exception as e:
+        logger.warning("Status store unavailable (%s), using in-process fallback", str(e))
+        _fallback_set(repo_id, {
+            "status": status,
+            "progress": progress,
+            "message": message or None
+        })
+
+def get_status(repo_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the recorded status of a repository.
+
+    Args:
+        repo_id: Repository ID
+
+    Returns:
+        Status dictionary, or None if the repository is unknown
+    """
+    try:
+        data = _get_client().hgetall(f"repo:{repo_id}")
+    except Exception as e:
+        logger.warning("Status store unavailable (%s), using in-process fallback", str(e))
+        return _fallback_get(repo_id)
+
+    if not data:
+        return _fallback_get(repo_id)
+
+    return {
+        "status": data["status"],
+        "progress": float(data["progress"]),
+        "message": data.get("message") or None
+    }
@@ -1,15 +1,18 @@
+import asyncio
 import os
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+import numpy as np
+from typing import List, Dict, Any, Optional, Union
 import logging
 
 from app.core.config import settings
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# IDs per collection.delete call when removing a repository
+DELETE_BATCH_SIZE = 1000
+
 class VectorStoreService:
     """
     Service for managing vector storage and retrieval using ChromaDB.
@@ -30,40 +33,59 @@ class VectorStoreService:
             )
         )
         
-        # Create or get the collection for code embeddings
+        # Create or get the collection for code embeddings. Vectors are
+        # L2-normalized before insert, so plain inner product ranks them
+        # identically to cosine while skipping the per-distance
+        # normalization cosine pays inside the HNSW traversal. The HNSW
+        # parameters only take effect when the collection is first created;
+        # see settings for what each knob trades off.
         self.collection = self.client.get_or_create_collection(
             name="code_embeddings",
-            metadata={"hnsw:space": "cosine"}
+            metadata={
+                "hnsw:space": "ip",
+                "hnsw:construction_ef": settings.HNSW_CONSTRUCTION_EF,
+                "hnsw:M": settings.HNSW_M,
+                "hnsw:num_threads": settings.HNSW_NUM_THREADS
+            }
         )
         
-        logger.info(f"ChromaDB initialized with collection 'code_embeddings'")
+        logger.info("ChromaDB initialized with collection 'code_embeddings'")
     
     def add_embeddings(
-        self, 
-        ids: List[str], 
-        embeddings: List[List[float]], 
+        self,
+        ids: List[str],
+        embeddings: Union[List[List[float]], np.ndarray],
         metadatas: List[Dict[str, Any]],
         documents: List[str]
     ) -> None:
         """
         Add embeddings to the vector store.
-        
+
+        Accepts either nested lists or an ndarray; arrays are funneled
+        through one contiguous float32 buffer so callers can hand over
+        encoder output directly. The pinned Chroma version validates
+        embeddings as Python lists of floats, so the array is unboxed in
+        a single C-level tolist() at the boundary rather than element by
+        element in caller loops.
+
         Args:
             ids: List of unique IDs for the embeddings
-            embeddings: List of embedding vectors
+            embeddings: Embedding vectors, as nested lists or an (N, D) array
             metadatas: List of metadata dictionaries
             documents: List of document texts
         """
         try:
+            if isinstance(embeddings, np.ndarray):
+                embeddings = np.ascontiguousarray(embeddings, dtype=np.float32).tolist()
             self.collection.add(
                 ids=ids,
                 embeddings=embeddings,
                 metadatas=metadatas,
                 documents=documents
             )
-            logger.info(f"Added {len(ids)} embeddings to ChromaDB")
+            logger.info("Added %d embeddings to ChromaDB", len(ids))
         except Exception as e:
-            logger.error(f"Error adding embeddings to ChromaDB: {str(e)}")
+            logger.error("Error adding embeddings to ChromaDB: %s", str(e))
             raise
     
     def query(
@@ -74,9 +96,13 @@ class VectorStoreService:
     ) -> Dict[str, Any]:
         """
         Query the vector store for similar embeddings.
-        
+
+        The collection uses inner-product distance over vectors that were
+        normalized at insert time, so the query embedding must be
+        L2-normalized as well for the scores to behave like cosine.
+
         Args:
-            query_embedding: The query embedding vector
+            query_embedding: The query embedding vector (L2-normalized)
             n_results: Number of results to return
             where: Filter condition for metadata
             
@@ -91,9 +117,55 @@ class VectorStoreService:
             )
             return results
         except Exception as e:
-            logger.error(f"Error querying ChromaDB: {str(e)}")
+            logger.error("Error querying ChromaDB: %s", str(e))
             raise
-    
+
+    def query_batch(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Query the vector store with several embeddings in one call.
+
+        Chroma runs the HNSW searches for the whole batch inside a single
+        native call, so concurrent callers get far better throughput by
+        pooling their queries here than by issuing one query() each.
+        Result lists are index-aligned with the input embeddings.
+
+        Args:
+            query_embeddings: The query embedding vectors (L2-normalized)
+            n_results: Number of results to return per query
+            where: Filter condition for metadata, applied to every query
+
+        Returns:
+            Dictionary containing per-query result lists
+        """
+        try:
+            return self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where
+            )
+        except Exception as e:
+            logger.error("Error batch-querying ChromaDB: %s", str(e))
+            raise
+
+    async def query_batch_async(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async wrapper around query_batch that runs the blocking HNSW
+        search on a worker thread so the event loop stays responsive.
+        """
+        return await asyncio.to_thread(
+            self.query_batch, query_embeddings, n_results, where
+        )
+
     def get_by_id(self, id: str) -> Dict[str, Any]:
         """
         Get an embedding by its ID.
@@ -107,7 +179,7 @@ class VectorStoreService:
         try:
             return self.collection.get(ids=[id])
         except Exception as e:
-            logger.error(f"Error getting embedding from ChromaDB: {str(e)}")
+            logger.error("Error getting embedding from ChromaDB: %s", str(e))
             raise
     
     def delete_by_id(self, id: str) -> None:
@@ -119,23 +191,41 @@ class VectorStoreService:
         """
         try:
             self.collection.delete(ids=[id])
-            logger.info(f"Deleted embedding with ID {id} from ChromaDB")
+            logger.info("Deleted embedding with ID %s from ChromaDB", id)
         except Exception as e:
-            logger.error(f"Error deleting embedding from ChromaDB: {str(e)}")
+            logger.error("Error deleting embedding from ChromaDB: %s", str(e))
             raise
     
     def delete_by_repository(self, repo_id: str) -> None:
         """
         Delete all embeddings for a specific repository.
-        
+
+        Chunk IDs are prefixed with the repository ID and persisted to a
+        sidecar file at insert time, so deletion works through known IDs
+        in batches instead of a metadata where-scan over the whole store.
+        The scan is kept as a fallback for repositories inserted before
+        the sidecar existed.
+
         Args:
             repo_id: The repository ID
         """
+        ids_path = os.path.join(settings.REPO_STORAGE_DIR, repo_id, "documentation", "ids.txt")
+        try:
+            with open(ids_path) as f:
+                ids = f.read().split()
+        except OSError:
+            ids = None
+
         try:
-            self.collection.delete(where={"repository_id": repo_id})
-            logger.info(f"Deleted all embeddings for repository {repo_id} from ChromaDB")
+            if ids:
+                for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                    self.collection.delete(ids=ids[start:start + DELETE_BATCH_SIZE])
+                os.remove(ids_path)
+            else:
+                self.collection.delete(where={"repository_id": repo_id})
+            logger.info("Deleted all embeddings for repository %s from ChromaDB", repo_id)
         except Exception as e:
-            logger.error(f"Error deleting repository embeddings from ChromaDB: {str(e)}")
+            logger.error("Error deleting repository embeddings from ChromaDB: %s", str(e))
             raise
 
 # Create a singleton instance
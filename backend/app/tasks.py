@@ -0,0 +1,30 @@
+import asyncio
+import logging
+from celery import Celery
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+celery_app = Celery(
+    "documentation_generator",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+)
+
+# Fail fast when the broker is down so callers can fall back to inline
+# processing instead of blocking the event loop on publish retries
+celery_app.conf.task_publish_retry = False
+
+@celery_app.task(name="app.tasks.process_repository")
+def process_repository_task(repo_id: str, repo_path: str) -> None:
+    """
+    Run the documentation pipeline for a repository on a Celery worker.
+
+    Args:
+        repo_id: Repository ID
+        repo_path: Path to the cloned/extracted repository
+    """
+    # Imported here so the worker doesn't pay for the service stack at import time
+    from app.services.documentation_service import documentation_service
+    asyncio.run(documentation_service.process_repository(repo_id, repo_path))